@@ -1,15 +1,29 @@
+# Backend non interactif imposé avant tout import de pyplot (contextily en importe un) : pas de sonde Tk/Qt,
+# et pas d'instabilité de matplotlib quand plusieurs utilisateurs tracent en parallèle
+import matplotlib
+matplotlib.use("Agg", force=True)
+
+import math
+import io
 import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
 import streamlit as st
+from concurrent.futures import ThreadPoolExecutor
 import requests
-import matplotlib.pyplot as plt
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from matplotlib.figure import Figure
-import networkx as nx
-from typing import Dict, List, Tuple
-import time
-import contextily as ctx
+from typing import Dict, List, Optional, Tuple
 import numpy as np
-import matplotlib.patches as mpatches
-from matplotlib.lines import Line2D
+import pydeck as pdk
+
+# Rastérisation plus rapide des longues polylignes d'itinéraire
+matplotlib.rcParams["path.simplify"] = True
+matplotlib.rcParams["path.simplify_threshold"] = 1.0
+matplotlib.rcParams["agg.path.chunksize"] = 10000
 
 # ----------------------------
 # CONFIGURATION STREAMLIT + CSS
@@ -31,6 +45,7 @@ st.markdown("""
         }
         .route-card { padding: 15px; background: #f0f8ff; border: 2px solid #4aa3ff; border-radius: 12px; margin-bottom: 15px; }
         .best-route { border-color: #816bff; background: #fff0f0; }
+        .route-map svg { width: 100%; height: auto; }
     </style>
 """, unsafe_allow_html=True)
 
@@ -38,161 +53,501 @@ st.markdown("""
 # SERVICE DE GÉOCODAGE ALTERNATIF
 # ----------------------------
 
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+GEOCODE_TTL = 86400  # s, durée de vie d'une adresse géocodée (mémoire du service et cache Streamlit)
+
+
+class RateLimiter:
+    """Espace les appels d'au moins `min_interval` secondes (partagé entre threads)"""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._last_call = 0.0
+
+    def wait(self):
+        with self._lock:
+            delay = self._last_call + self.min_interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            self._last_call = time.monotonic()
+
+
+class BoundedTTLCache:
+    """Petit cache clé -> valeur borné en taille, dont les entrées expirent après `ttl` secondes"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Tuple[float, float]]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[float, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Tuple[float, float]):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)  # la moins récemment utilisée
+
+
+def _normalize_address(address: str) -> str:
+    """Normalise une adresse pour que les saisies équivalentes partagent la même clé de cache"""
+    # Une seule mise en minuscules, réutilisée par le test ci-dessous
+    address = address.strip().lower()
+
+    # Ajouter Kinshasa si ce n'est pas spécifié
+    if "kinshasa" not in address:
+        address = f"{address}, kinshasa, rdc"
+
+    return address
+
+
+# Premiers mots qui signalent une voie : seules ces saisies justifient une recherche structurée
+STREET_KEYWORDS = ("avenue", "av", "boulevard", "bd", "rue", "route", "chaussée", "place")
+
+
+def _looks_like_street(part: str) -> bool:
+    """Vrai si la saisie ressemble à une adresse de rue (mot-clé de voie ou numéro)"""
+    words = part.replace(".", " ").split()
+    return bool(words) and (words[0] in STREET_KEYWORDS or any(ch.isdigit() for ch in part))
+
+
+def _search_params(address: str) -> List[Dict]:
+    """Requêtes Nominatim à essayer dans l'ordre : texte libre, puis recherche structurée pour une rue"""
+    common = {"format": "json", "limit": 1, "countrycodes": "cd"}  # RDC
+
+    # Le texte libre trouve directement les communes et quartiers (Gombe, Lingwala...)
+    candidates = [{"q": address, **common}]
+
+    # Repli structuré uniquement pour une rue, que la recherche libre rate parfois
+    street = address.split(",")[0].strip()
+    if _looks_like_street(street):
+        candidates.append({"street": street, "city": "Kinshasa",
+                           "country": "Democratic Republic of the Congo", **common})
+
+    return candidates
+
+
+@st.cache_data(ttl=GEOCODE_TTL, show_spinner=False)
+def _geocode_cached(address: str, _session: requests.Session,
+                    _rate_limiter: RateLimiter) -> Tuple[float, float]:
+    """Interroge Nominatim pour une adresse déjà normalisée (session et limiteur hors clé de cache)"""
+    try:
+        for params in _search_params(address):
+            _rate_limiter.wait()  # 1 requête/s maximum sur l'instance publique
+            response = _session.get(NOMINATIM_URL, params=params, timeout=10)
+            response.raise_for_status()
+
+            data = response.json()
+            if data:
+                break
+        else:
+            raise Exception(f"Adresse introuvable: '{address}'")
+
+        lat = float(data[0]["lat"])
+        lon = float(data[0]["lon"])
+
+        return lat, lon
+
+    except requests.RequestException as e:
+        raise Exception(f"Erreur réseau: {str(e)}")
+
+
+def _build_perturbed_paths(lat1: float, lon1: float, lat2: float, lon2: float,
+                           n: int, amp: float) -> np.ndarray:
+    """Deux tracés (+/-) ondulant autour du segment départ-arrivée -> tableau (2, n, 2) de lon/lat"""
+    paths = np.empty((2, n, 2))
+    for i in range(n):
+        # t calculé à la main : np.linspace ne donne pas exactement les mêmes valeurs sous Numba
+        t = i / (n - 1)
+        phase = i * 0.5
+        d_lon = amp * math.sin(phase)
+        d_lat = amp * math.cos(phase)
+        lon = lon1 + (lon2 - lon1) * t
+        lat = lat1 + (lat2 - lat1) * t
+        paths[0, i, 0] = lon + d_lon
+        paths[0, i, 1] = lat + d_lat
+        paths[1, i, 0] = lon - d_lon
+        paths[1, i, 1] = lat - d_lat
+    return paths
+
+
+def _build_perturbed_paths_numpy(lat1: float, lon1: float, lat2: float, lon2: float,
+                                 n: int, amp: float) -> np.ndarray:
+    """Équivalent vectorisé de _build_perturbed_paths, utilisé sans numba"""
+    i = np.arange(n)
+    t = i / (n - 1)
+    phase = i * 0.5
+    d = amp * np.column_stack([np.sin(phase), np.cos(phase)])
+    base = np.column_stack([lon1 + (lon2 - lon1) * t, lat1 + (lat2 - lat1) * t])
+    return np.stack([base + d, base - d])
+
+
+@st.cache_resource
+def _perturbed_paths_kernel():
+    """Noyau de génération des tracés, choisi une fois par processus : numba s'il est installé, sinon NumPy"""
+    # Import différé : numba n'est chargé (et le noyau compilé) qu'au premier tracé, pas à chaque rerun
+    try:
+        from numba import njit
+    except ImportError:  # numba est optionnel : repli sur la version NumPy
+        return _build_perturbed_paths_numpy
+
+    return njit(fastmath=True)(_build_perturbed_paths)
+
+DEMO_NUM_POINTS = 20
+
+
+@st.cache_resource(max_entries=256)
+def _demo_paths(lat1: float, lon1: float, lat2: float, lon2: float) -> np.ndarray:
+    """Tracés de démonstration (2, n, 2) en float32, mémoïsés sur les coordonnées arrondies (partagés, donc en lecture seule)"""
+    paths = _perturbed_paths_kernel()(lat1, lon1, lat2, lon2, DEMO_NUM_POINTS, 0.001).astype(np.float32)
+    paths.setflags(write=False)
+    return paths
+
+
+# Partie invariante des itinéraires de démonstration : seuls les tracés changent d'un appel à l'autre
+_ROUTE_TEMPLATES: Tuple[Dict, Dict] = (
+    {
+        "distance_km": 15.5,
+        "duration_min": 45.0,
+        "steps": [
+            {"name": "Prendre l'avenue de la Justice", "distance_text": "2 km", "duration_text": "5 min"},
+            {"name": "Tourner à gauche sur le Boulevard du 30 Juin", "distance_text": "8 km", "duration_text": "25 min"},
+            {"name": "Continuer tout droit vers la destination", "distance_text": "5.5 km", "duration_text": "15 min"}
+        ],
+        "index": 0,
+        "start_address": "Point de départ",
+        "end_address": "Destination",
+        "distance_text": "15.5 km",
+        "duration_text": "45 min",
+        "is_best": True
+    },
+    {
+        "distance_km": 17.2,
+        "duration_min": 52.0,
+        "steps": [
+            {"name": "Prendre l'avenue des Aviateurs", "distance_text": "3 km", "duration_text": "8 min"},
+            {"name": "Tourner à droite sur l'avenue de la Libération", "distance_text": "10 km", "duration_text": "30 min"},
+            {"name": "Prendre la sortie vers la destination", "distance_text": "4.2 km", "duration_text": "14 min"}
+        ],
+        "index": 1,
+        "start_address": "Point de départ",
+        "end_address": "Destination",
+        "distance_text": "17.2 km",
+        "duration_text": "52 min",
+        "is_best": False
+    }
+)
+
+
+def _round_coords(start_coords: Tuple[float, float], end_coords: Tuple[float, float]) -> Tuple[float, ...]:
+    """Clé de mémoïsation : départ et arrivée arrondis à 4 décimales (~10 m)"""
+    return tuple(round(c, 4) for c in (*start_coords, *end_coords))
+
+
 class OpenStreetMapService:
     def __init__(self):
-        self.nominatim_url = "https://nominatim.openstreetmap.org/search"
+        self.nominatim_url = NOMINATIM_URL
+
+        # Session persistante : la connexion TLS reste ouverte entre deux géocodages
+        self.session = requests.Session()
+        self.session.headers.update({
+            "User-Agent": "trajets-kinshasa/1.0",  # exigé par la politique d'usage de Nominatim
+            "Accept-Encoding": "gzip",
+        })
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4,
+                              max_retries=Retry(total=2, backoff_factor=0.3))
+        self.session.mount("https://", adapter)
+        self.rate_limiter = RateLimiter(1.0)
+
+        # Cache mémoire du service (qui survit aux reruns) devant le cache Streamlit,
+        # borné et soumis à la même durée de vie que lui
+        self._geocode_cache = BoundedTTLCache(max_entries=256, ttl=GEOCODE_TTL)
         
     def geocode(self, address: str) -> Tuple[float, float]:
         """Convertit une adresse en coordonnées avec OpenStreetMap"""
         if not address.strip():
             raise ValueError("L'adresse ne peut pas être vide")
-            
-        # Ajouter Kinshasa si ce n'est pas spécifié
-        if "kinshasa" not in address.lower():
-            address = f"{address}, Kinshasa, RDC"
-            
-        params = {
-            "q": address,
-            "format": "json",
-            "limit": 1,
-            "countrycodes": "cd"  # RDC
-        }
-        
-        try:
-            response = requests.get(self.nominatim_url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            data = response.json()
-            if not data:
-                raise Exception(f"Adresse introuvable: '{address}'")
-                
-            lat = float(data[0]["lat"])
-            lon = float(data[0]["lon"])
-            
-            return lat, lon
-            
-        except requests.RequestException as e:
-            raise Exception(f"Erreur réseau: {str(e)}")
+
+        key = _normalize_address(address)
+        coords = self._geocode_cache.get(key)
+        if coords is None:
+            coords = _geocode_cached(key, self.session, self.rate_limiter)
+            self._geocode_cache.set(key, coords)
+
+        return coords
     
     def get_routes_demo(self, start_coords: Tuple[float, float], end_coords: Tuple[float, float]) -> List[Dict]:
         """Génère des itinéraires de démonstration"""
-        # Calculer une route approximative
-        lat1, lon1 = start_coords
-        lat2, lon2 = end_coords
-        
-        # Générer quelques points intermédiaires pour simuler un itinéraire
-        num_points = 20
-        lats = np.linspace(lat1, lat2, num_points)
-        lons = np.linspace(lon1, lon2, num_points)
-        
-        # Ajouter un peu de variation pour simuler des routes différentes
-        coords1 = [(lons[i] + 0.001 * np.sin(i*0.5), lats[i] + 0.001 * np.cos(i*0.5)) 
-                  for i in range(num_points)]
-        coords2 = [(lons[i] - 0.001 * np.sin(i*0.5), lats[i] - 0.001 * np.cos(i*0.5)) 
-                  for i in range(num_points)]
-        
-        routes = [
-            {
-                "coords": coords1,
-                "distance_km": 15.5,
-                "duration_min": 45.0,
-                "steps": [
-                    {"name": "Prendre l'avenue de la Justice", "distance_text": "2 km", "duration_text": "5 min"},
-                    {"name": "Tourner à gauche sur le Boulevard du 30 Juin", "distance_text": "8 km", "duration_text": "25 min"},
-                    {"name": "Continuer tout droit vers la destination", "distance_text": "5.5 km", "duration_text": "15 min"}
-                ],
-                "index": 0,
-                "start_address": "Point de départ",
-                "end_address": "Destination",
-                "distance_text": "15.5 km",
-                "duration_text": "45 min",
-                "is_best": True
-            },
-            {
-                "coords": coords2,
-                "distance_km": 17.2,
-                "duration_min": 52.0,
-                "steps": [
-                    {"name": "Prendre l'avenue des Aviateurs", "distance_text": "3 km", "duration_text": "8 min"},
-                    {"name": "Tourner à droite sur l'avenue de la Libération", "distance_text": "10 km", "duration_text": "30 min"},
-                    {"name": "Prendre la sortie vers la destination", "distance_text": "4.2 km", "duration_text": "14 min"}
-                ],
-                "index": 1,
-                "start_address": "Point de départ",
-                "end_address": "Destination",
-                "distance_text": "17.2 km",
-                "duration_text": "52 min",
-                "is_best": False
-            }
-        ]
-        
-        return routes
+        # Générer quelques points intermédiaires, avec un peu de variation
+        # pour simuler des routes différentes (tableaux float32 (num_points, 2) de lon/lat)
+        coords1, coords2 = _demo_paths(*_round_coords(start_coords, end_coords))
+
+        return [{**_ROUTE_TEMPLATES[0], "coords": coords1},
+                {**_ROUTE_TEMPLATES[1], "coords": coords2}]
 
 # ----------------------------
 # WIDGET CARTE (MapWidget)
 # ----------------------------
 
+# Cache disque des tuiles OSM, conservé d'un redémarrage à l'autre
+TILE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "trajets-kinshasa", "tiles")
+
+
+@st.cache_resource(max_entries=64)
+def _fetch_basemap(west: float, south: float, east: float, north: float):
+    """Télécharge la mosaïque OSM d'une emprise et la reprojette en EPSG:4326 -> (img, extent)"""
+    # Import différé : contextily tire rasterio/pyproj, inutiles tant qu'aucune carte statique n'est demandée
+    import contextily as ctx
+
+    os.makedirs(TILE_CACHE_DIR, exist_ok=True)
+    ctx.set_cache_dir(TILE_CACHE_DIR)
+
+    img, extent = ctx.bounds2img(west, south, east, north, ll=True,
+                                 source=ctx.providers.OpenStreetMap.Mapnik)
+    return ctx.warp_tiles(img, extent, t_crs='EPSG:4326')
+
+
+@st.cache_resource
+def _build_template() -> bytes:
+    """Figure vierge avec titre, axes et grille, sérialisée une fois pour être clonée à chaque carte"""
+    fig = Figure(figsize=(10, 8))
+    ax = fig.add_subplot(111)
+    ax.set_title("Carte des itinéraires - Kinshasa (OpenStreetMap)", fontsize=14, fontweight='bold')
+    ax.set_xlabel("Longitude")
+    ax.set_ylabel("Latitude")
+    ax.grid(True, alpha=0.3)
+    return pickle.dumps(fig)
+
+
+
+def _bbox_of(all_pts: np.ndarray) -> Tuple[float, float, float, float]:
+    """(min_lon, max_lon, min_lat, max_lat) d'un nuage de points lon/lat, avec marge, arrondi à 3 décimales"""
+    # Une seule réduction NumPy par borne, marge appliquée aux deux axes à la fois
+    margin = 0.01
+    mins = all_pts.min(0) - margin
+    maxs = all_pts.max(0) + margin
+    return (round(float(mins[0]), 3), round(float(maxs[0]), 3),
+            round(float(mins[1]), 3), round(float(maxs[1]), 3))
+
+
+@st.cache_resource(max_entries=256)
+def _demo_bbox(lat1: float, lon1: float, lat2: float, lon2: float) -> Tuple[float, float, float, float]:
+    """Emprise de tous les tracés de démonstration : identique quels que soient les itinéraires affichés"""
+    return _bbox_of(_demo_paths(lat1, lon1, lat2, lon2).reshape(-1, 2))
+
+
+# Tolérance (en degrés, ~1 m) de la simplification des tracés, et taille à partir de laquelle
+# une ligne est rastérisée dans les exports vectoriels
+SIMPLIFY_TOLERANCE = 1e-5
+RASTERIZE_MIN_POINTS = 5000
+
+
+def _simplify_path(coords: np.ndarray, tolerance: float = SIMPLIFY_TOLERANCE) -> np.ndarray:
+    """Simplifie une polyligne (N, 2) par Ramer–Douglas–Peucker ; les extrémités sont conservées"""
+    n = len(coords)
+    if n < 3:
+        return coords
+
+    pts = coords.astype(np.float64)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+
+    # Version itérative : chaque segment calcule d'un bloc les distances de ses points intérieurs
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+
+        seg = pts[last] - pts[first]
+        inner = pts[first + 1:last] - pts[first]
+        seg_len = math.hypot(seg[0], seg[1])
+        if seg_len == 0:
+            dists = np.hypot(inner[:, 0], inner[:, 1])
+        else:
+            dists = np.abs(seg[0] * inner[:, 1] - seg[1] * inner[:, 0]) / seg_len
+
+        k = int(np.argmax(dists))
+        if dists[k] > tolerance:
+            split = first + 1 + k
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+
+    return coords[keep]
+
+
+def _hex_to_rgb(color: str) -> List[int]:
+    """Convertit une couleur '#rrggbb' en [r, g, b] pour pydeck"""
+    return [int(color[i:i + 2], 16) for i in (1, 3, 5)]
+
+
 class MapWidget:
     def __init__(self):
         self.fig = None
         self.ax = None
+        self.basemap_error: Optional[Exception] = None
+
+    def _compute_bbox(self, routes: List[Dict]) -> Optional[Tuple[float, float, float, float]]:
+        """Calcule (min_lon, max_lon, min_lat, max_lat) avec marge, arrondi à 3 décimales"""
+        arrays = [route["coords"] for route in routes if len(route.get("coords", ()))]
+        if not arrays:
+            return None
+
+        return _bbox_of(np.vstack(arrays))
+
+    def _init_map(self):
+        """Initialise une nouvelle figure à partir du gabarit pré-construit"""
+        # Gabarit obtenu à la demande : rien n'est construit tant que la carte statique n'est pas affichée
+        self.fig = pickle.loads(_build_template())
+        self.ax = self.fig.axes[0]
 
-    def plot_routes(self, routes: List[Dict], route_colors: Dict[int, str] = None):
-        """Affiche les itinéraires sur la carte"""
-        self.fig = Figure(figsize=(10, 8))
-        self.ax = self.fig.add_subplot(111)
-        self.ax.set_title("Carte des itinéraires - Kinshasa (OpenStreetMap)", fontsize=14, fontweight='bold')
-        self.ax.set_xlabel("Longitude")
-        self.ax.set_ylabel("Latitude")
-        self.ax.grid(True, alpha=0.3)
+    def plot_routes(self, routes: List[Dict], route_colors: Dict[int, str] = None,
+                    bbox: Optional[Tuple[float, float, float, float]] = None):
+        """Affiche les itinéraires sur une figure neuve (emprise calculée depuis les tracés si `bbox` n'est pas fourni)"""
+        drawable = [route for route in routes if len(route.get("coords", []))]
+        if bbox is None:
+            bbox = self._compute_bbox(drawable)
 
-        if not routes:
+        self._init_map()
+
+        if not drawable:
             return self.fig
 
         # Couleurs par défaut
         if route_colors is None:
             route_colors = {0: "#816bff", 1: "#4ecdc4", 2: "#d80bf7"}
 
+        # Champs de chaque itinéraire lus une seule fois, hors de la boucle de tracé
+        styled = [(route["index"], route["coords"], route.get("is_best", False)) for route in drawable]
+        colors = [route_colors.get(idx, "#666666") for idx, _, _ in styled]
+
         # Tracer chaque itinéraire
-        for route in routes:
-            coords = route.get("coords", [])
-            if not coords:
-                continue
-            
-            xs, ys = zip(*coords)
-            color = route_colors.get(route.get("index", 0), "#666666")
-            linewidth = 4 if route.get("is_best", False) else 2
-            alpha = 1.0 if route.get("is_best", False) else 0.7
-            
-            self.ax.plot(xs, ys, color=color, linewidth=linewidth, alpha=alpha, zorder=10,
-                        label=f"{'⭐ ' if route.get('is_best', False) else ''}Itinéraire {route.get('index', 0) + 1}")
+        for i, (idx, coords, is_best) in enumerate(styled):
+            coords = _simplify_path(coords)
+            xs, ys = coords[:, 0], coords[:, 1]
+            if is_best:
+                linewidth, alpha, label = 4, 1.0, f"⭐ Itinéraire {idx + 1}"
+            else:
+                linewidth, alpha, label = 2, 0.7, f"Itinéraire {idx + 1}"
+
+            self.ax.plot(xs, ys, color=colors[i], linewidth=linewidth, alpha=alpha, zorder=10,
+                         label=label, rasterized=len(coords) >= RASTERIZE_MIN_POINTS)
 
         # Marqueurs de départ et arrivée
-        if routes and routes[0].get("coords"):
-            start_lon, start_lat = routes[0]["coords"][0]
-            end_lon, end_lat = routes[0]["coords"][-1]
-            
-            self.ax.scatter(start_lon, start_lat, c='green', s=200, edgecolors='white', linewidth=2, zorder=11, marker='o', label='Départ')
-            self.ax.scatter(end_lon, end_lat, c='red', s=200, edgecolors='white', linewidth=2, zorder=11, marker='s', label='Arrivée')
+        start_lon, start_lat = drawable[0]["coords"][0]
+        end_lon, end_lat = drawable[0]["coords"][-1]
+
+        self.ax.scatter(start_lon, start_lat, c='green', s=200, edgecolors='white', linewidth=2, zorder=11, marker='o', label='Départ')
+        self.ax.scatter(end_lon, end_lat, c='red', s=200, edgecolors='white', linewidth=2, zorder=11, marker='s', label='Arrivée')
 
         # Ajouter le fond de carte OpenStreetMap
         try:
-            if routes and routes[0].get("coords"):
-                all_lons = [coord[0] for route in routes for coord in route.get("coords", [])]
-                all_lats = [coord[1] for route in routes for coord in route.get("coords", [])]
-                
-                if all_lons and all_lats:
-                    margin = 0.01
-                    self.ax.set_xlim(min(all_lons) - margin, max(all_lons) + margin)
-                    self.ax.set_ylim(min(all_lats) - margin, max(all_lats) + margin)
-                    
-                    ctx.add_basemap(self.ax, crs='EPSG:4326', source=ctx.providers.OpenStreetMap.Mapnik)
+            img, extent = _fetch_basemap(bbox[0], bbox[2], bbox[1], bbox[3])
+            self.ax.imshow(img, extent=extent, interpolation='bilinear', zorder=0)
+        except ImportError:
+            pass  # contextily non installé : carte sans fond
         except Exception as e:
+            self.basemap_error = e
             st.warning(f"⚠️ Fond de carte non disponible: {e}")
+        finally:
+            self.ax.set_xlim(bbox[0], bbox[1])
+            self.ax.set_ylim(bbox[2], bbox[3])
 
         self.ax.legend(loc='upper left', fontsize=10, framealpha=0.9)
+
         return self.fig
 
+    def build_deck(self, routes: List[Dict], route_colors: Dict[int, str] = None) -> pdk.Deck:
+        """Construit une carte pydeck (WebGL) : le fond et les tracés sont rendus par le navigateur"""
+        if route_colors is None:
+            route_colors = {0: "#816bff", 1: "#4ecdc4", 2: "#d80bf7"}
+
+        drawable = [route for route in routes if len(route.get("coords", []))]
+        layers = []
+
+        if drawable:
+            paths = [
+                {
+                    "name": f"{'⭐ ' if route.get('is_best', False) else ''}Itinéraire {route.get('index', 0) + 1}",
+                    "path": _simplify_path(route["coords"]).tolist(),
+                    "color": _hex_to_rgb(route_colors.get(route.get("index", 0), "#666666")),
+                    "width": 6 if route.get("is_best", False) else 3,
+                }
+                for route in drawable
+            ]
+            layers.append(pdk.Layer(
+                "PathLayer", paths,
+                get_path="path", get_color="color", get_width="width",
+                width_units="pixels", pickable=True,
+            ))
+
+            # Marqueurs de départ et arrivée
+            coords = drawable[0]["coords"]
+            for point, name, color in ((coords[0], "Départ", [0, 128, 0]), (coords[-1], "Arrivée", [255, 0, 0])):
+                layers.append(pdk.Layer(
+                    "ScatterplotLayer", [{"position": point.tolist(), "name": name}],
+                    get_position="position", get_fill_color=color, get_line_color=[255, 255, 255],
+                    get_radius=9, radius_units="pixels", stroked=True, line_width_min_pixels=2, pickable=True,
+                ))
+
+            view_state = pdk.data_utils.compute_view(np.concatenate([route["coords"] for route in drawable]).tolist())
+        else:
+            # Centre de Kinshasa par défaut
+            view_state = pdk.ViewState(latitude=-4.32, longitude=15.31, zoom=11)
+
+        return pdk.Deck(layers=layers, initial_view_state=view_state,
+                        map_provider="carto", map_style=pdk.map_styles.ROAD,
+                        tooltip={"text": "{name}"})
+
+ROUTE_COLORS = {0: "#816bff", 1: "#4ecdc4"}
+
+# (bordure, fond) des cartes d'itinéraire, indexé par is_best
+CARD_COLORS = (("#4aa3ff", "#f5f8ff"), ("#816bff", "#fff0f0"))
+
+
+class _UncachedRender(Exception):
+    """Rendu à afficher tel quel mais à ne pas mettre en cache (fond de carte indisponible)"""
+
+    def __init__(self, svg: str):
+        super().__init__("Fond de carte indisponible")
+        self.svg = svg
+
+
+@st.cache_data(ttl=86400, max_entries=64, show_spinner=False)
+def _render_map_svg(start_coords: Tuple[float, float], end_coords: Tuple[float, float],
+                    route_indices: Tuple[int, ...]) -> str:
+    """Carte statique sérialisée en SVG : pour une même recherche, aucun travail matplotlib n'est refait"""
+    routes = get_maps_service().get_routes_demo(start_coords, end_coords)
+
+    map_widget = MapWidget()
+    fig = map_widget.plot_routes([route for route in routes if route["index"] in route_indices], ROUTE_COLORS,
+                                 bbox=_demo_bbox(*_round_coords(start_coords, end_coords)))
+
+    buf = io.StringIO()
+    fig.savefig(buf, format='svg')
+    svg = buf.getvalue()
+    svg = svg[svg.index("<svg"):]  # sans l'en-tête XML/DOCTYPE, pour l'insérer dans la page
+
+    # Une exception n'est pas mise en cache : la carte sans fond sera retentée au prochain affichage
+    if map_widget.basemap_error is not None:
+        raise _UncachedRender(svg)
+
+    return svg
+
 # ----------------------------
 # INTERFACE UTILISATEUR
 # ----------------------------
@@ -202,8 +557,12 @@ st.title("🗺️ Trajets Kinshasa - Version Démo (OpenStreetMap)")
 st.warning("🔧 **Mode démonstration activé** - Utilisation d'OpenStreetMap gratuit")
 st.info("💡 Cette version utilise des données de démonstration pour contourner les limites de quota Google Maps")
 
-# Initialisation du service
-maps_service = OpenStreetMapService()
+# Initialisation du service (partagé entre les reruns pour garder la session HTTP ouverte)
+@st.cache_resource
+def get_maps_service() -> OpenStreetMapService:
+    return OpenStreetMapService()
+
+maps_service = get_maps_service()
 
 col1, col2 = st.columns(2)
 with col1:
@@ -213,16 +572,30 @@ with col2:
 
 launch = st.button("🚗 Générer les itinéraires de démonstration")
 
+# Le clic est mémorisé avec la saisie du moment : les reruns suivants (fragment compris)
+# réaffichent ces résultats sans dépendre de l'état éphémère du bouton
 if launch:
+    st.session_state["launch"] = (start_place, end_place)
+
+
+@st.fragment
+def _render_results(start_place: Optional[str], end_place: Optional[str]):
+    """Géocode, affiche les itinéraires et la carte ; seul ce bloc est réexécuté par ses widgets"""
+    if start_place is None:
+        return
+
     if not start_place or not end_place:
         st.error("Veuillez remplir les deux champs.")
-        st.stop()
+        return
 
     with st.spinner("Calcul des itinéraires (mode démo)..."):
         try:
-            # Géocodage avec OpenStreetMap
-            start_coords = maps_service.geocode(start_place)
-            end_coords = maps_service.geocode(end_place)
+            # Géocodage avec OpenStreetMap (les deux adresses en parallèle)
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                start_future = executor.submit(maps_service.geocode, start_place)
+                end_future = executor.submit(maps_service.geocode, end_place)
+                start_coords = start_future.result()
+                end_coords = end_future.result()
             
             st.success(f"📍 Départ trouvé: {start_coords}")
             st.success(f"🎯 Arrivée trouvée: {end_coords}")
@@ -233,26 +606,48 @@ if launch:
             # Afficher les informations
             st.subheader("📊 Itinéraires de démonstration")
             
+            # Toutes les cartes en un seul élément Streamlit
+            html_parts = []
             for route in routes:
-                border_color = "#816bff" if route.get("is_best") else "#4aa3ff"
-                bg_color = "#fff0f0" if route.get("is_best") else "#f5f8ff"
-                
-                st.markdown(f"""
-                <div style="padding: 15px; background: {bg_color}; border: 2px solid {border_color}; border-radius: 12px; margin-bottom: 15px;">
-                    <h4 style="margin:0; color: {border_color};">
-                        {'⭐ Itinéraire Optimal' if route.get('is_best') else f'Itinéraire {route.get(\"index\", 0) + 1}'}
-                    </h4>
-                    <b>📏 Distance:</b> {route['distance_text']}<br>
-                    <b>⏱️ Durée:</b> {route['duration_text']}<br>
-                    <b>🚶 Nombre d'étapes:</b> {len(route['steps'])}
-                </div>
-                """, unsafe_allow_html=True)
+                border_color, bg_color = CARD_COLORS[bool(route.get("is_best"))]
+                title = '⭐ Itinéraire Optimal' if route.get('is_best') else f"Itinéraire {route.get('index', 0) + 1}"
+
+                html_parts.append(f"""<div style="padding: 15px; background: {bg_color}; border: 2px solid {border_color}; border-radius: 12px; margin-bottom: 15px;">
+    <h4 style="margin:0; color: {border_color};">{title}</h4>
+    <b>📏 Distance:</b> {route['distance_text']}<br>
+    <b>⏱️ Durée:</b> {route['duration_text']}<br>
+    <b>🚶 Nombre d'étapes:</b> {len(route['steps'])}
+</div>""")
+
+            st.markdown("\n".join(html_parts), unsafe_allow_html=True)
+
+            # Choix des itinéraires à tracer (ne relance que ce fragment)
+            visible = st.multiselect(
+                "Itinéraires affichés sur la carte",
+                [route["index"] for route in routes],
+                default=[route["index"] for route in routes],
+                format_func=lambda i: f"Itinéraire {i + 1}",
+            )
+
+            render_mode = st.radio(
+                "Rendu de la carte",
+                ["Interactive (navigateur)", "Image statique"],
+                horizontal=True,
+            )
 
             # Afficher la carte
-            map_widget = MapWidget()
-            route_colors = {0: "#816bff", 1: "#4ecdc4"}
-            fig = map_widget.plot_routes(routes, route_colors)
-            st.pyplot(fig)
+            if render_mode == "Image statique":
+                try:
+                    svg = _render_map_svg(start_coords, end_coords, tuple(sorted(visible)))
+                except _UncachedRender as e:
+                    svg = e.svg
+                st.markdown(f'<div class="route-map">{svg}</div>', unsafe_allow_html=True)
+            else:
+                shown = [route for route in routes if route["index"] in visible]
+                st.pydeck_chart(MapWidget().build_deck(shown, ROUTE_COLORS))
 
         except Exception as e:
-            st.error(f"Erreur: {str(e)}")
\ No newline at end of file
+            st.error(f"Erreur: {str(e)}")
+
+
+_render_results(*st.session_state.get("launch", (None, None)))